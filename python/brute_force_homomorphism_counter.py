@@ -1,30 +1,396 @@
 # from https://stackoverflow.com/questions/68782863/graph-homomorphism-using-python
 
-from itertools import product
+from functools import lru_cache
 
+import numpy as np
+from numba import njit, prange
 
+# ahead of time compiled count_homs, built by build_hom_aot.py
+# AOT_VERSION has to be increased whenever the arguments of count_homs change,
+# a module built for another version is ignored
+AOT_VERSION = 2
 
-def verify(G, H, f):
-   homomorphism = True
+try:
+   import hom_counter_aot
+   count_homs_aot = hom_counter_aot.count_homs if hom_counter_aot.version() == AOT_VERSION else None
+except (ImportError, AttributeError):
+   count_homs_aot = None
 
-   for edge in G:
-       if not ((f[edge[0]], f[edge[1]]) in H):
-           homomorphism = False
-           break
+# the ahead of time build runs serially, it is only used for searches with at most
+# this many assignments of the searched vertices, where the jit compile time would dominate
+AOT_MAX_SEARCH = 10 ** 6
 
-   return homomorphism
 
-def solve(G, H, n, m):
-   rangeH = [i for i in range(m)]
-   assignments = list(product(rangeH, repeat=n))
+# G is a tuple of edges and H contains every edge (i, j) of H encoded as i * m + j
+def verify(G, H, f, m):
+   for (u, v) in G:
+       if f[u] * m + f[v] not in H:
+           return False
+
+   return True
+
+# orders the edges of G such that a failing assignment is rejected early
+# a random assignment maps every edge of G into H with the same probability |H| / m^2
+# and a self loop with probability (loops of H) / m, so the only selectivity difference
+# is between loops and other edges, the less likely kind is checked first
+# within each kind the edges with the highest degree sum of their endpoints come first
+def fail_first_edges(G, H, n, m):
+   degree = [0] * n
+   for (u, v) in G:
+       degree[u] += 1
+       degree[v] += 1
+
+   loops = sum(1 for (i, j) in H if i == j)
+   loops_first = loops * m < len(H)
+
+   return tuple(sorted(G, key=lambda e: ((e[0] == e[1]) != loops_first, -degree[e[0]] - degree[e[1]])))
+
+# the original pure python version, kept as a reference
+def solve_naive(G, H, n, m):
+   G_list = fail_first_edges(G, H, n, m)
+   H_flat = frozenset(i * m + j for (i, j) in H)
+   if m == 0:
+       return 1 if n == 0 else 0
+
+   # the assignment is changed in place like a base m counter
+   f = [0] * n
    cnt = 0
 
-   for f in assignments:
-       if verify(G, H, f):
+   while True:
+       if verify(G_list, H_flat, f, m):
            cnt += 1
 
+       i = 0
+       while i < n:
+           f[i] += 1
+           if f[i] < m:
+               break
+           f[i] = 0
+           i += 1
+       else:
+           break
+
+   return cnt
+
+# orders the vertices of G by a depth first search which starts at a vertex of highest degree
+# so that most vertices already have assigned neighbours when they are reached
+# returns the order and the number of vertices which have to be branched on
+def vertex_order(G, n):
+   neighbours = [set() for _ in range(n)]
+   for (u, v) in G:
+       if u != v:
+           neighbours[u].add(v)
+           neighbours[v].add(u)
+
+   order = []
+   visited = [False] * n
+
+   for root in sorted(range(n), key=lambda v: -len(neighbours[v])):
+       stack = [root]
+       while stack:
+           v = stack.pop()
+           if visited[v]:
+               continue
+           visited[v] = True
+           order.append(v)
+           # the neighbour of highest degree is pushed last and therefore visited next
+           for w in sorted(neighbours[v], key=lambda w: len(neighbours[w])):
+               if not visited[w]:
+                   stack.append(w)
+
+   # vertices of an independent set are placed at the end, their number of possible
+   # values only depends on the vertices before them and is counted without branching
+   independent = [False] * n
+   for v in reversed(order):
+       if not any(independent[w] for w in neighbours[v]):
+           independent[v] = True
+
+   search = [v for v in order if not independent[v]]
+   return search + [v for v in order if independent[v]], len(search)
+
+# collects for the k-th vertex of the order the edges to vertices placed before it
+# a check (p, d) means (f[p], c) in H for d = 0, (c, f[p]) in H for d = 1 and (c, c) in H for d = 2
+# where c is the value of the k-th vertex
+def edge_checks(G, order):
+   position = [0] * len(order)
+   for k, v in enumerate(order):
+       position[v] = k
+
+   checks = [[] for _ in order]
+   for (u, v) in G:
+       if position[u] < position[v]:
+           checks[position[v]].append((position[u], 0))
+       elif position[u] > position[v]:
+           checks[position[u]].append((position[v], 1))
+       else:
+           checks[position[u]].append((position[u], 2))
+
+   ptr = np.zeros(len(order) + 1, np.int32)
+   for k in range(len(order)):
+       ptr[k + 1] = ptr[k] + len(checks[k])
+
+   return ptr, np.array([c for cs in checks for c in cs], dtype=np.int32).reshape(-1, 2)
+
+# number of set bits of x
+@njit(cache=True)
+def popcount(x):
+   cnt = 0
+   while x:
+       x &= x - np.uint64(1)
+       cnt += 1
+
+   return cnt
+
+# the possible values of the k-th vertex as bitset, given the values f of the vertices before it
+# masks[0, x] are the out-neighbours of x in H, masks[1, x] the in-neighbours of x
+# and masks[2, x] are the vertices of H with a self loop for every x
+@njit(cache=True)
+def candidates(k, f, ptr, checks, masks, full):
+   cand = full
+   for e in range(ptr[k], ptr[k + 1]):
+       cand &= masks[checks[e, 1], f[checks[e, 0]]]
+
+   return cand
+
+# number of ways to assign the independent vertices at the end of the order
+@njit(cache=True)
+def extensions(f, ptr, checks, masks, full, n, n_search):
+   cnt = 1
+   for k in range(n_search, n):
+       cnt *= popcount(candidates(k, f, ptr, checks, masks, full))
+       if cnt == 0:
+           break
+
    return cnt
 
+# counts the homomorphisms which map the first two vertices of the order to x and y
+# by backtracking over the first n_search vertices of the order
+# the values of a vertex are taken from the bitset of its candidates, which is empty
+# as soon as one of its edges to the vertices before can not be mapped to an edge of H
+@njit(cache=True)
+def count_from(x, y, ptr, checks, masks, full, n, n_search):
+   f = np.zeros(n, np.int32)
+   f[0] = x
+   f[1] = y
+   if n_search == 2:
+       return extensions(f, ptr, checks, masks, full, n, n_search)
+
+   one = np.uint64(1)
+   cand = np.zeros(n_search, np.uint64)
+   cand[2] = candidates(2, f, ptr, checks, masks, full)
+   cnt = 0
+   k = 2
+
+   while k >= 2:
+       if cand[k] == 0:
+           k -= 1
+           continue
+
+       # take the lowest remaining candidate of the k-th vertex
+       low = cand[k] & ~(cand[k] - one)
+       cand[k] ^= low
+       f[k] = popcount(low - one)
+
+       if k == n_search - 1:
+           cnt += extensions(f, ptr, checks, masks, full, n, n_search)
+       else:
+           k += 1
+           cand[k] = candidates(k, f, ptr, checks, masks, full)
+
+   return cnt
+
+# the first vertex only takes one value roots[r] of every orbit of the automorphisms of H,
+# the homomorphisms of the other values of that orbit are counted by the weight weights[r]
+# the subtrees of the pairs of values of the first two vertices are counted in parallel,
+# so there is enough parallel work even if H has only a single orbit
+@njit(cache=True, parallel=True)
+def count_homs(ptr, checks, masks, full, roots, weights, n, n_search):
+   f = np.zeros(n, np.int32)
+   if n_search == 0:
+       return extensions(f, ptr, checks, masks, full, n, n_search)
+
+   one = np.uint64(1)
+   m = masks.shape[1]
+   first = candidates(0, f, ptr, checks, masks, full)
+   cnt = 0
+
+   if n_search == 1:
+       for r in range(roots.shape[0]):
+           f[0] = roots[r]
+           if (first >> np.uint64(f[0])) & one:
+               cnt += weights[r] * extensions(f, ptr, checks, masks, full, n, n_search)
+       return cnt
+
+   xs = np.zeros(roots.shape[0] * m, np.int32)
+   ys = np.zeros(roots.shape[0] * m, np.int32)
+   ws = np.zeros(roots.shape[0] * m, np.int64)
+   pairs = 0
+   for r in range(roots.shape[0]):
+       f[0] = roots[r]
+       if (first >> np.uint64(f[0])) & one:
+           second = candidates(1, f, ptr, checks, masks, full)
+           for y in range(m):
+               if (second >> np.uint64(y)) & one:
+                   xs[pairs] = f[0]
+                   ys[pairs] = y
+                   ws[pairs] = weights[r]
+                   pairs += 1
+
+   for p in prange(pairs):
+       cnt += ws[p] * count_from(xs[p], ys[p], ptr, checks, masks, full, n, n_search)
+
+   return cnt
+
+# searches an automorphism of H which maps x to y
+# vertices are only mapped onto vertices of the same colour and a partial permutation is dropped
+# as soon as it does not preserve the edges between its vertices
+# the vertices are mapped in breadth first order from x, so that most of them have mapped neighbours
+def find_automorphism(H, m, colour, neighbours, x, y):
+   order = []
+   in_order = [False] * m
+   for start in [x] + list(range(m)):
+       if in_order[start]:
+           continue
+       in_order[start] = True
+       order.append(start)
+
+       i = len(order) - 1
+       while i < len(order):
+           for w in sorted(neighbours[order[i]]):
+               if not in_order[w]:
+                   in_order[w] = True
+                   order.append(w)
+           i += 1
+
+   p = [-1] * m
+   used = [False] * m
+
+   def extend(k):
+       if k == m:
+           return True
+
+       a = order[k]
+       for b in ([y] if k == 0 else range(m)):
+           if used[b] or colour[a] != colour[b]:
+               continue
+           if all(((a, c) in H) == ((b, p[c]) in H) and ((c, a) in H) == ((p[c], b) in H) for c in order[:k]):
+               p[a] = b
+               used[b] = True
+               if extend(k + 1):
+                   return True
+               used[b] = False
+
+       return False
+
+   return extend(0)
+
+# colours the vertices of H such that every automorphism maps a vertex onto one of the same colour
+# starting with the self loops, a colour is refined by the colours of the out- and in-neighbours
+# until the number of colours does not change anymore
+def refined_colours(H, m):
+   out_nbrs = [[] for _ in range(m)]
+   in_nbrs = [[] for _ in range(m)]
+   for (i, j) in H:
+       out_nbrs[i].append(j)
+       in_nbrs[j].append(i)
+
+   colour = [int((v, v) in H) for v in range(m)]
+   classes = len(set(colour))
+   while True:
+       keys = [(colour[v], tuple(sorted(colour[w] for w in out_nbrs[v])), tuple(sorted(colour[w] for w in in_nbrs[v])))
+               for v in range(m)]
+       ids = {}
+       colour = [ids.setdefault(key, len(ids)) for key in keys]
+       if len(ids) == classes:
+           return colour
+       classes = len(ids)
+
+# the automorphism search may take exponential time, so only small H are considered
+MAX_AUTOMORPHISM_VERTICES = 16
+
+# one vertex of every orbit of the automorphisms of H together with the size of its orbit
+@lru_cache(maxsize=128)
+def orbits(H, m):
+   if m > MAX_AUTOMORPHISM_VERTICES:
+       return np.arange(m, dtype=np.int32), np.ones(m, np.int64)
+
+   colour = refined_colours(H, m)
+   neighbours = [set() for _ in range(m)]
+   for (i, j) in H:
+       neighbours[i].add(j)
+       neighbours[j].add(i)
+
+   roots = []
+   weights = []
+   seen = [False] * m
+   for x in range(m):
+       if not seen[x]:
+           orbit = [x] + [y for y in range(x + 1, m) if not seen[y] and colour[y] == colour[x]
+                            and find_automorphism(H, m, colour, neighbours, x, y)]
+           for y in orbit:
+               seen[y] = True
+           roots.append(x)
+           weights.append(len(orbit))
+
+   return np.array(roots, dtype=np.int32), np.array(weights, dtype=np.int64)
+
+# the arrays describing G for count_homs, the vertex order and the edge checks
+# they are cached, so repeated calls with the same G skip building them
+@lru_cache(maxsize=128)
+def prepare_G(G, n):
+   order, n_search = vertex_order(G, n)
+   ptr, checks = edge_checks(G, order)
+
+   return ptr, checks, n_search
+
+# the bitsets of H for count_homs, cached like those of G
+@lru_cache(maxsize=128)
+def prepare_H(H, m):
+   out_nbr = [0] * m
+   in_nbr = [0] * m
+   loops = 0
+   for (i, j) in H:
+       out_nbr[i] |= 1 << j
+       in_nbr[j] |= 1 << i
+       if i == j:
+           loops |= 1 << i
+   masks = np.array([out_nbr, in_nbr, [loops] * m], dtype=np.uint64).reshape(3, m)
+
+   # the largest number of set bits of each kind of bitset in masks
+   max_degree = [max((x.bit_count() for x in nbr), default=0) for nbr in (out_nbr, in_nbr, [loops])]
+
+   return masks, np.uint64((1 << m) - 1), max_degree
+
+# an upper bound for the number of homomorphisms following the branching of count_homs
+# a vertex without edges to the vertices before it takes any of the m values, otherwise
+# its candidates are a subset of each bitset of its checks
+def count_bound(ptr, checks, max_degree, n, m):
+   bound = 1
+   for k in range(n):
+       bound *= min((max_degree[checks[e, 1]] for e in range(ptr[k], ptr[k + 1])), default=m)
+
+   return bound
+
+def solve(G, H, n, m):
+   if m > 64:
+       raise ValueError("the bitsets of H only support up to 64 vertices")
+
+   G = frozenset(G)
+   H = frozenset(H)
+   ptr, checks, n_search = prepare_G(G, n)
+   masks, full, max_degree = prepare_H(H, m)
+   roots, weights = orbits(H, m)
+
+   # the kernel counts in int64
+   if count_bound(ptr, checks, max_degree, n, m) >= 2 ** 63:
+       raise ValueError("the number of homomorphisms may exceed the int64 range of the kernel")
+
+   if count_homs_aot is not None and m ** n_search <= AOT_MAX_SEARCH:
+       counter = count_homs_aot
+   else:
+       counter = count_homs
+   return counter(ptr, checks, masks, full, roots, weights, n, n_search)
+
 """
 G = {(0,1),(1,0),(1,3),(3,1),(1,2),(2,1),(2,4),(4,2)}
 H = {(0,1), (0,2), (0,3), (0,4),
@@ -33,6 +399,7 @@ H = {(0,1), (0,2), (0,3), (0,4),
      (3,0), (3,1), (3,2), (3,4),
      (4,0), (4,1), (4,2), (4,3)}"""
 
-G = {(2,4),(4,2),(1,2),(2,1)}
-H = {(0,1),(1,0),(1,2),(2,1),(2,3),(3,2),(0,3),(3,0)}
-print("number:" + str(solve(G, H, 5, 4)))
+if __name__ == "__main__":
+   G = {(2,4),(4,2),(1,2),(2,1)}
+   H = {(0,1),(1,0),(1,2),(2,1),(2,3),(3,2),(0,3),(3,0)}
+   print("number:" + str(solve(G, H, 5, 4)))
@@ -0,0 +1,23 @@
+# Compiles count_homs ahead of time into the extension module hom_counter_aot
+# brute_force_homomorphism_counter.py uses it for small searches if its version matches and thereby skips the jit compilation
+# run from this directory: python build_hom_aot.py
+
+from numba.pycc import CC
+
+from brute_force_homomorphism_counter import AOT_VERSION, count_homs
+
+cc = CC('hom_counter_aot')
+
+# count_homs(ptr, checks, masks, full, roots, weights, n, n_search)
+cc.export('count_homs', 'i8(i4[:],i4[:,:],u8[:,:],u8,i4[:],i8[:],i8,i8)')(count_homs.py_func)
+
+
+# the version of count_homs this module was built for
+def version():
+    return AOT_VERSION
+
+cc.export('version', 'i8()')(version)
+
+
+if __name__ == "__main__":
+    cc.compile()
@@ -0,0 +1,6 @@
+# Shared file export of the generator scripts
+
+# a function that exports a generated text into a file
+def text_to_file(text, file_name):
+    with open(file_name, "w") as f:
+        f.write(text)
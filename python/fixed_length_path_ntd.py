@@ -5,6 +5,7 @@
 # ntd with |E_tau| from n to 2n - 1
 # adjacency stays the same
 
+from file_handler import text_to_file
 
 FILE_PATH = '../data/nice_tree_decompositions/e_tau_modifying_paths/'
 
@@ -12,41 +13,40 @@ FILE_PATH = '../data/nice_tree_decompositions/e_tau_modifying_paths/'
 # Creates e_tau modyfying path of length n and with i additional edges
 # 0 <= i < n
 def e_tau_modifying_path(n,i):
-    output = "# auto generated nice tree decomposition with " + str(n) + " vertices and " + str(n + i) +  " possible edges. \n"
-    output += "s " + str(2*n) + " 2 " + str(n) + "\n"
-    output += "n 1 l 1\n"
+    output = []
+    append = output.append
+    append(f"# auto generated nice tree decomposition with {n} vertices and {n + i} possible edges. \n")
+    append(f"s {2*n} 2 {n}\n")
+    append("n 1 l 1\n")
+
+    # strings of all numbers occurring in the bag and adjacency lines
+    S = [str(k) for k in range(2*n+2)]
 
     vertex_counter = 1
     node_counter = 2
 
     for j in range(1, n):
         if vertex_counter <= i:
-            output += "n " + str(node_counter) + " i " + str(vertex_counter) + " " + str(vertex_counter+1) + "\n"
+            append("n " + S[node_counter] + " i " + S[vertex_counter] + " " + S[vertex_counter + 1] + "\n")
             node_counter += 1
-            output += "n " + str(node_counter) + " f " + str(vertex_counter + 1) + "\n"
+            append("n " + S[node_counter] + " f " + S[vertex_counter + 1] + "\n")
             node_counter += 1
             vertex_counter += 1
         else:
-            output += "n " + str(node_counter) + " f" + "\n"
+            append("n " + S[node_counter] + " f\n")
             node_counter += 1
-            output += "n " + str(node_counter) + " i " + str(vertex_counter + 1) + "\n"
+            append("n " + S[node_counter] + " i " + S[vertex_counter + 1] + "\n")
             node_counter += 1
             vertex_counter += 1
 
-    output += "n " + str(node_counter) + " f\n"
+    append("n " + S[node_counter] + " f\n")
 
     for i in range(1, node_counter):
-        output += "a " + str(i + 1) + " " + str(i)
+        append("a " + S[i + 1] + " " + S[i])
         if i < node_counter - 1:
-            output += "\n"
-
-    return output
+            append("\n")
 
-# a function that exports the generated graphs into files
-def text_to_file(text, file_name):
-    f = open(file_name, "w")
-    f.write(text)
-    f.close()
+    return "".join(output)
 
 
 def e_tau_modifying_paths(n):
@@ -5,56 +5,67 @@
 # width n - 1
 # number of nodes = 2 * n
 
+from functools import lru_cache
+from itertools import accumulate
+
+from file_handler import text_to_file
 
 FILE_PATH = '../data/nice_tree_decompositions/benchmark_ntds/complete_ntds/'
 
+# the bags " 1 2 ... i" for i = 0 to n, every bag extends the one before
+# the complete ntds of all sizes up to n can share them
+def complete_bags(n):
+    return list(accumulate((" " + str(j) for j in range(1, n + 1)), initial=""))
+
+
+# the adjacency line between node i + 1 and node i, it is the same in the complete ntds
+# of all sizes, so it is cached and shared between them
+@lru_cache(maxsize=None)
+def adjacency_line(i):
+    return "a " + str(i + 1) + " " + str(i)
+
+
 # generates a ntd with all edges possible
 # this may be a worst case instance
-def complete_ntd(n):
+def complete_ntd(n, bags=None):
+
+    if bags is None:
+        bags = complete_bags(n)
 
-    output = "# auto generated nice complete tree decomposition with " + str(n) + " vertices and " + str(int(n * (n-1) / 2 + n)) +  " possible edges.\n"
-    output += "s " + str(2*n) + " 2 " + str(n) + "\n"
-    output += "n 1 l 1\n"
+    output = []
+    append = output.append
+    append(f"# auto generated nice complete tree decomposition with {n} vertices and {int(n * (n-1) / 2 + n)} possible edges.\n")
+    append(f"s {2*n} 2 {n}\n")
+    append("n 1 l 1\n")
+
+    # strings of all node numbers occurring in the node lines
+    S = [str(k) for k in range(2*n+2)]
 
     node_counter = 2
 
     for i in range(2,n+1):
-        output += "n " + str(node_counter) + " i"
-        for j in range(1,i+1):
-            output += " " + str(j)
-        output += "\n"
+        append("n " + S[node_counter] + " i" + bags[i] + "\n")
 
         node_counter += 1
 
     for i in range(n - 1,-1, -1):
-        output += "n " + str(node_counter) + " f"
-        for j in range(1,i+1):
-            output +=  " " + str(j)
-        output += "\n"
+        append("n " + S[node_counter] + " f" + bags[i] + "\n")
 
         node_counter += 1
 
-    for i in range(1, node_counter - 1):
-        output += "a " + str(i + 1) + " " + str(i)
-
-        if i < node_counter - 2:
-            output += "\n"
-
-    return output
+    append("\n".join(adjacency_line(i) for i in range(1, node_counter - 1)))
 
-
-# a function that exports the generated graphs into files
-def text_to_file(text, file_name):
-    f = open(file_name, "w")
-    f.write(text)
-    f.close()
+    return "".join(output)
 
 
 # generate complete nice tree decompositions for n to m vertices
 def generate_complete_ntds(n,m):
 
+    # the bags of the largest ntd, the smaller ntds use the first of them
+    bags = complete_bags(m)
+
     for i in range(n,m + 1):
-        text = complete_ntd(i)
+        text = complete_ntd(i, bags)
         filename = "ntd_complete_" + str(i) + ".ntd"
         text_to_file(text, FILE_PATH + filename)
 
@@ -5,37 +5,34 @@
 # width = 1
 # number of nodes = 2 * n
 
+from file_handler import text_to_file
 
 FILE_PATH = '../data/nice_tree_decompositions/benchmark_ntds/path_ntds/'
 
 # simply generating a path like nice tree decomposition
 def path_ntd(n):
-    output = "# auto generated nice path tree decomposition with " + str(n) + " vertices and " + str((2 * n - 1)) +  " possible edges. \n"
-    output += "s " + str(2*n) + " 2 " + str(n) + "\n"
-    output += "n 1 l 1\n"
+    output = []
+    append = output.append
+    append(f"# auto generated nice path tree decomposition with {n} vertices and {2 * n - 1} possible edges. \n")
+    append(f"s {2*n} 2 {n}\n")
+    append("n 1 l 1\n")
 
     node_counter = 2
 
     for i in range(2,n+1):
-        output += "n " + str(node_counter) + " i " + str(i-1) + " " + str(i) + "\n"
+        append(f"n {node_counter} i {i-1} {i}\n")
         node_counter += 1
-        output += "n " + str(node_counter) + " f " + str(i) + "\n"
+        append(f"n {node_counter} f {i}\n")
         node_counter += 1
 
-    output += "n " + str(node_counter) + " f\n"
+    append(f"n {node_counter} f\n")
 
     for i in range(1, node_counter):
-        output += "a " + str(i + 1) + " " + str(i)
+        append(f"a {i + 1} {i}")
         if i < node_counter - 1:
-            output += "\n"
+            append("\n")
 
-    return output
-
-# a function that exports the generated graphs into files
-def text_to_file(text, file_name):
-    f = open(file_name, "w")
-    f.write(text)
-    f.close()
+    return "".join(output)
 
 
 # generate path nice tree decompositions for n to m vertices
@@ -1,47 +1,45 @@
 # This python script will produce random mentis graphs for given n and m
 
-import random
+import numpy as np
 
-FILE_PATH = '../data/metis_graphs/auto_generated_graphs/'
-
-def random_graph(n, m):
-    text = "% Random generated graph with " + str(n) + " vertices and " + str(m) + " edges. \n"
-    text += str(n) + " " + str(m)
+from file_handler import text_to_file
 
-    adjacency_matrix = [[0 for x in range(n)] for y in range(n)]
+FILE_PATH = '../data/metis_graphs/auto_generated_graphs/'
 
-    for i in range(m):
-        set = False
-        while not set:
-            u = random.randint(0, n-1)
-            v = random.randint(0, n-1)
+# set a seed to reproduce the generated graphs
+SEED = None
+rng = np.random.default_rng(SEED)
 
-            if adjacency_matrix[u][v] == 0:
-                # we assume undirected graphs with self loops
-                adjacency_matrix[u][v] = 1
-                adjacency_matrix[v][u] = 1
-                set = True
+def random_graph(n, m):
+    text = []
+    append = text.append
+    append(f"% Random generated graph with {n} vertices and {m} edges. \n")
+    append(f"{n} {m}")
+
+    # we assume undirected graphs with self loops
+    # the n * (n + 1) / 2 possible edges {u, v} with v <= u are numbered by u * (u + 1) / 2 + v,
+    # sampling m distinct numbers avoids retrying already placed edges
+    edge_ids = rng.choice(n * (n + 1) // 2, m, replace=False)
+    u = ((np.sqrt(8 * edge_ids + 1) - 1) // 2).astype(np.int64)
+    # corrects rounding errors of the floating point square root
+    u -= u * (u + 1) // 2 > edge_ids
+    u += (u + 1) * (u + 2) // 2 <= edge_ids
+    v = edge_ids - u * (u + 1) // 2
+
+    # neighbour lists of all vertices as one array sorted by vertex and neighbour
+    loops = u == v
+    vertices = np.concatenate((u, v[~loops]))
+    neighbours = np.concatenate((v, u[~loops]))
+    order = np.lexsort((neighbours, vertices))
+    neighbours = list(map(str, (neighbours[order] + 1).tolist()))
+    start = np.searchsorted(vertices[order], np.arange(n + 1)).tolist()
 
     for i in range(n):
-        text += "\n"
-        first = True
-        for j in range(n):
-            if adjacency_matrix[i][j] == 1:
-
-                if first:
-                    text += str(j + 1)
-                    first = False
-                else:
-                    text += " " + str(j)
-
-    return text
+        append("\n")
+        append(" ".join(neighbours[start[i]:start[i + 1]]))
 
+    return "".join(text)
 
-# a function that exports the generated graphs into files
-def text_to_file(text, file_name):
-    f = open(file_name, "w")
-    f.write(text)
-    f.close()
 
 # A function generating a random graph for fixed n and m
 def generate_graph_for_fixed_n_and_m(n,m):
@@ -59,7 +57,7 @@ def generate_graphs():
         print("generating graph with " + str(2**i) + " vertices")
         # random graph with 2**i vertices and random number of edges between 2**i and (2**i) ** 2
 
-        generate_graph_for_fixed_n_and_m(2**i, random.randint(2**i , (2**i) * (2**i - 1) * (1/2)))
+        generate_graph_for_fixed_n_and_m(2**i, int(rng.integers(2**i , (2**i) * (2**i - 1) // 2, endpoint=True)))
 
 
 generate_graphs()
\ No newline at end of file